@@ -1,27 +1,42 @@
 # cache.py
 import time
+import heapq
 import threading
 
 _lock = threading.Lock()
 _store: dict[str, tuple[float, object]] = {}
-# _store[key] = (expires_at_epoch_seconds, value)
+# _store[key] = (expires_at_monotonic_seconds, value)
+_expiry: list[tuple[float, str]] = []  # (expires_at, key) min-heap
+
+# Bound once: a global name beats the attribute walk on every call.
+_monotonic = time.monotonic
+_store_get = _store.get
 
 def get(key: str):
     """Return cached value or None if missing/expired."""
-    now = time.time()
-    with _lock:
-        item = _store.get(key)
-        if not item:
-            return None
-        exp, val = item
-        if now >= exp:
-            # expired
-            _store.pop(key, None)
-            return None
-        return val
+    # Lock-free: dict.get of one key is atomic under the GIL and the
+    # (exp, value) tuple is immutable, so readers see a consistent snapshot.
+    item = _store_get(key)
+    if not item:
+        return None
+    exp, val = item
+    if _monotonic() >= exp:
+        return None  # stale; reclaimed by purge_expired()
+    return val
 
 def set(key: str, value, ttl_seconds: int):
     """Cache value for ttl_seconds."""
-    exp = time.time() + ttl_seconds
+    exp = _monotonic() + ttl_seconds
     with _lock:
         _store[key] = (exp, value)
+        heapq.heappush(_expiry, (exp, key))
+
+def purge_expired():
+    """Drop expired entries; call periodically so unread keys don't pile up."""
+    now = _monotonic()
+    with _lock:
+        while _expiry and _expiry[0][0] <= now:
+            exp, key = heapq.heappop(_expiry)
+            item = _store.get(key)
+            if item is not None and item[0] == exp:  # not re-set since
+                del _store[key]
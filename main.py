@@ -1,9 +1,15 @@
 # main.py — WxBot_76067 (UTC time, saved locations, caching, /wx_set)
 import os
-import json
+import re
+import sys
 import time
 import math
+import atexit
+import hashlib
+import asyncio
 import logging
+import sqlite3
+import heapq
 import threading
 from datetime import datetime
 from functools import lru_cache
@@ -11,11 +17,12 @@ from zoneinfo import ZoneInfo
 from typing import Optional
 
 import httpx
+import numpy as np
+import orjson
 from dotenv import load_dotenv
 
 import discord
 from discord import app_commands
-from discord.ext import commands
 
 # ----------------------------- Config / Env -----------------------------
 load_dotenv()
@@ -30,7 +37,6 @@ LAT = float(os.getenv("LAT", "32.793195"))
 LON = float(os.getenv("LON", "-98.089052"))
 
 COLORS = {
-    "primary":  0x2B6CB0,   # blue
     "now":      0x3182CE,   # lighter blue
     "forecast": 0x2F855A,   # green
 }
@@ -44,55 +50,111 @@ logging.basicConfig(
 try:
     LOCAL_TZ = ZoneInfo(TZ_NAME)
 except Exception as e:
-    logging.warning(f"Could not load timezone '{TZ_NAME}': {e} (falling back to UTC)")
+    logging.warning("Could not load timezone '%s': %s (falling back to UTC)", TZ_NAME, e)
     LOCAL_TZ = ZoneInfo("UTC")
 
+# ----------------------------- Shared HTTP client -----------------------------
+# One pooled client for every NWS/Nominatim call: keep-alive reuses the TCP+TLS
+# connection, so repeat commands skip the handshake a fresh client would pay.
+HTTP = httpx.AsyncClient(
+    base_url="https://api.weather.gov",  # NWS calls use relative paths; absolute URLs still work
+    timeout=15,
+    follow_redirects=True,
+    http2=True,  # api.weather.gov speaks HTTP/2; dependent calls multiplex one connection
+    headers={
+        "User-Agent": NWS_UA,
+        "Accept": "application/geo+json",
+        # NWS GeoJSON is verbose and compresses ~2-5x; br needs the brotli extra.
+        "Accept-Encoding": "gzip, br",
+    },
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+)
+
+def _close_http():
+    try:
+        asyncio.run(HTTP.aclose())
+    except Exception:
+        pass
+
+atexit.register(_close_http)
+
 # ----------------------------- Discord setup -----------------------------
 intents = discord.Intents.default()  # slash commands only; no message content needed
-client = commands.Bot(command_prefix="!", intents=intents)
-tree = client.tree  # command tree for slash cmds
+client = discord.Client(intents=intents)  # plain Client: no prefix-command machinery
+tree = app_commands.CommandTree(client)  # command tree for slash cmds
 
 # ----------------------------- Tiny storage (per-user saved locations) -----------------------------
-# Saves to ./data/locations.json : { "<discord_user_id>": { "home": {station_id, lat, lon, units} } }
+# SQLite in WAL mode: saves touch one row instead of rewriting a JSON file,
+# and a crash can't corrupt the store. Reads still come from the in-memory
+# dict; the DB is only written through on mutation.
 DATA_DIR = "data"
-LOC_PATH = os.path.join(DATA_DIR, "locations.json")
+LOC_PATH = os.path.join(DATA_DIR, "locations.json")  # legacy store, migrated below
+LOC_DB_PATH = os.path.join(DATA_DIR, "locations.db")
 os.makedirs(DATA_DIR, exist_ok=True)
 _loc_lock = threading.Lock()
 
-def _loc_load() -> dict:
+_loc_db = sqlite3.connect(LOC_DB_PATH, check_same_thread=False)
+_loc_db.execute("PRAGMA journal_mode=WAL")
+_loc_db.execute("PRAGMA synchronous=NORMAL")  # no per-commit fsync storm
+_loc_db.execute(
+    "CREATE TABLE IF NOT EXISTS locations("
+    " user_id TEXT NOT NULL, name TEXT NOT NULL,"
+    " station TEXT, lat REAL, lon REAL, units TEXT,"
+    " PRIMARY KEY(user_id, name))"
+)
+atexit.register(_loc_db.close)
+
+def _loc_migrate_json() -> None:
+    """One-time import of the old locations.json store."""
     if not os.path.exists(LOC_PATH):
-        return {}
+        return
     try:
-        with open(LOC_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(LOC_PATH, "rb") as f:
+            data = orjson.loads(f.read())
     except Exception:
-        return {}
+        return
+    with _loc_db:
+        for user_id, entries in data.items():
+            for name, e in entries.items():
+                _loc_db.execute(
+                    "INSERT OR IGNORE INTO locations VALUES(?,?,?,?,?,?)",
+                    (user_id, name, e.get("station_id"), e.get("lat"), e.get("lon"), e.get("units")),
+                )
+    os.replace(LOC_PATH, LOC_PATH + ".migrated")
 
-def _loc_save(data: dict) -> None:
-    with open(LOC_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+def _loc_load() -> dict:
+    data: dict = {}
+    rows = _loc_db.execute("SELECT user_id, name, station, lat, lon, units FROM locations")
+    for user_id, name, station, lat, lon, units in rows:
+        data.setdefault(user_id, {})[name] = {
+            "station_id": station, "lat": lat, "lon": lon, "units": units,
+        }
+    return data
+
+_loc_migrate_json()
+_LOC_CACHE: dict = _loc_load()
 
 def save_location(user_id: str, name: str, entry: dict) -> None:
     with _loc_lock:
-        data = _loc_load()
-        user = data.get(user_id, {})
-        user[name] = entry
-        data[user_id] = user
-        _loc_save(data)
+        _LOC_CACHE.setdefault(user_id, {})[name] = entry
+        with _loc_db:
+            _loc_db.execute(
+                "INSERT OR REPLACE INTO locations VALUES(?,?,?,?,?,?)",
+                (user_id, name, entry.get("station_id"), entry.get("lat"), entry.get("lon"), entry.get("units")),
+            )
 
 def get_location(user_id: str, name: str = "home") -> Optional[dict]:
-    data = _loc_load()
-    return data.get(user_id, {}).get(name)
+    return _LOC_CACHE.get(user_id, {}).get(name)
 
 def list_locations(user_id: str):
-    return list(_loc_load().get(user_id, {}).keys())
+    return list(_LOC_CACHE.get(user_id, {}).keys())
 
 def delete_location(user_id: str, name: str) -> bool:
     with _loc_lock:
-        data = _loc_load()
-        if user_id in data and name in data[user_id]:
-            del data[user_id][name]
-            _loc_save(data)
+        if user_id in _LOC_CACHE and name in _LOC_CACHE[user_id]:
+            del _LOC_CACHE[user_id][name]
+            with _loc_db:
+                _loc_db.execute("DELETE FROM locations WHERE user_id=? AND name=?", (user_id, name))
             return True
     return False
 
@@ -113,89 +175,137 @@ def resolve_user_location(user_id: int):
 # ----------------------------- In-memory cache (TTL) -----------------------------
 _cache_lock = threading.Lock()
 _cache: dict[str, tuple[float, object]] = {}
-# _cache[key] = (expires_at_epoch_seconds, value)
+# _cache[key] = (expires_at_monotonic_seconds, value)
+_cache_exp: list[tuple[float, str]] = []  # (expires_at, key) min-heap
+CACHE_SWEEP_INTERVAL = 30  # seconds between expired-entry sweeps
+
+# Bound once: a global name beats the attribute walk on every call.
+_monotonic = time.monotonic
+_cache_item = _cache.get
 
 def cache_get(key: str):
-    now = time.time()
-    with _cache_lock:
-        item = _cache.get(key)
-        if not item:
-            return None
-        exp, val = item
-        if now >= exp:
-            _cache.pop(key, None)
-            return None
-        return val
-
-def cache_set(key: str, value, ttl_seconds: int):
-    exp = time.time() + ttl_seconds
+    # Lock-free: dict.get of one key is atomic under the GIL and the
+    # (exp, value) tuple is immutable, so readers see a consistent snapshot.
+    item = _cache_item(key)
+    if not item:
+        return None
+    exp, val = item
+    if _monotonic() >= exp:
+        return None  # stale; the sweeper reclaims it
+    return val
+
+def cache_set(key: str, value, ttl_seconds: float):
+    exp = _monotonic() + ttl_seconds
     with _cache_lock:
         _cache[key] = (exp, value)
+        heapq.heappush(_cache_exp, (exp, key))
+
+def cache_ttl_remaining(key: str) -> float:
+    """Seconds until key expires, or 0.0 if missing/expired."""
+    item = _cache_item(key)
+    if not item:
+        return 0.0
+    return max(0.0, item[0] - _monotonic())
+
+def _cache_sweep() -> None:
+    """Drop expired entries so never-touched keys don't pile up."""
+    now = _monotonic()
+    with _cache_lock:
+        while _cache_exp and _cache_exp[0][0] <= now:
+            exp, key = heapq.heappop(_cache_exp)
+            item = _cache.get(key)
+            if item is not None and item[0] == exp:  # not re-set since
+                del _cache[key]
 
-# ----------------------------- Helpers / units / emoji -----------------------------
-def c_to_f(c):
-    return None if c is None else (c * 9/5 + 32)
-
-def kmh_to_mph(kmh):
-    return None if kmh is None else (kmh * 0.621371)
+async def _cache_sweep_loop() -> None:
+    while True:
+        await asyncio.sleep(CACHE_SWEEP_INTERVAL)
+        _cache_sweep()
 
-def deg_to_compass(deg):
-    if deg is None: return "—"
-    dirs = ["N","NNE","NE","ENE","E","ESE","SE","SSE",
-            "S","SSW","SW","WSW","W","WNW","NW","NNW"]
-    return dirs[round(deg/22.5) % 16]
+# ----------------------------- Helpers / units / emoji -----------------------------
+_COMPASS_DIRS = ("N","NNE","NE","ENE","E","ESE","SE","SSE",
+                 "S","SSW","SW","WSW","W","WNW","NW","NNW")
+# One entry per whole degree 0..360 — beats rounding math and memoization.
+_COMPASS_BY_DEG = tuple(_COMPASS_DIRS[round(d/22.5) % 16] for d in range(361))
+
+def deg_to_compass(deg: int | None) -> str:
+    return "—" if deg is None else _COMPASS_BY_DEG[int(deg) % 361]
+
+# (pattern, emoji) in priority order — first match wins; synonyms share one
+# compiled alternation so each rule is a single C-level scan.
+_WX_PATTERNS = tuple(
+    (re.compile(pat), emoji)
+    for pat, emoji in (
+        (r"thunder|t-storm", "⛈️"),
+        (r"heavy snow", "❄️❄️"),
+        (r"heavy rain", "🌧️🌧️"),
+        (r"snow", "❄️"),
+        (r"sleet|ice|freezing", "🌨️"),
+        (r"rain|showers", "🌧️"),
+        (r"drizzle|sprinkles", "🌦️"),
+        (r"fog|mist", "🌫️"),
+        (r"haze|smoke", "🌁"),
+        (r"windy|breezy|gust", "💨"),
+        (r"overcast", "☁️"),
+        (r"mostly cloudy|partly sunny", "🌥️"),
+        (r"partly cloudy", "⛅"),
+        (r"mostly sunny", "🌤️"),
+        (r"sunny", "☀️"),
+        (r"clear", "✨"),
+    )
+)
 
+@lru_cache(maxsize=256)
 def wx_emoji(text: str | None) -> str:
     """Map NWS descriptions to a simple emoji."""
     if not text:
         return "❔"
     t = text.lower()
-    if "thunder" in t or "t-storm" in t: return "⛈️"
-    if "heavy snow" in t: return "❄️❄️"
-    if "heavy rain" in t: return "🌧️🌧️"
-    if "snow" in t: return "❄️"
-    if "sleet" in t or "ice" in t or "freezing" in t: return "🌨️"
-    if "rain" in t or "showers" in t: return "🌧️"
-    if "drizzle" in t or "sprinkles" in t: return "🌦️"
-    if "fog" in t or "mist" in t: return "🌫️"
-    if "haze" in t or "smoke" in t: return "🌁"
-    if "windy" in t or "breezy" in t or "gust" in t: return "💨"
-    if "overcast" in t: return "☁️"
-    if "mostly cloudy" in t or "partly sunny" in t: return "🌥️"
-    if "partly cloudy" in t: return "⛅"
-    if "mostly sunny" in t: return "🌤️"
-    if "sunny" in t: return "☀️"
-    if "clear" in t: return "✨"
+    for pat, emoji in _WX_PATTERNS:
+        if pat.search(t):
+            return emoji
     return "❔"
 
+# All 16 compass points mapped straight to their 8-direction arrow.
+# (WSW stays with the SW arrow, matching the old first-match order.)
+_WIND_ARROW = {
+    "N": "⬆️", "NNE": "⬆️",
+    "NE": "↗️", "ENE": "↗️",
+    "E": "➡️", "ESE": "➡️",
+    "SE": "↘️", "SSE": "↘️",
+    "S": "⬇️", "SSW": "⬇️",
+    "SW": "↙️", "WSW": "↙️",
+    "W": "⬅️", "WNW": "⬅️",
+    "NW": "↖️", "NNW": "↖️",
+}
+
+@lru_cache(maxsize=256)
 def wind_arrow_from_compass(compass: str | None) -> str:
     """Map 16-pt compass to an 8-direction arrow."""
-    if not compass: return ""
-    c = compass.upper()
-    groups = {
-        "⬆️": {"N","NNE"},
-        "↗️": {"NE","ENE"},
-        "➡️": {"E","ESE"},
-        "↘️": {"SE","SSE"},
-        "⬇️": {"S","SSW"},
-        "↙️": {"SW","WSW"},
-        "⬅️": {"W","WSW","WNW"},  # keep W family here
-        "↖️": {"NW","NNW"},
-    }
-    for arrow, names in groups.items():
-        if c in names:
-            return arrow
-    if c in {"N","E","S","W"}:
-        return {"N":"⬆️","E":"➡️","S":"⬇️","W":"⬅️"}[c]
-    return ""
+    return _WIND_ARROW.get(compass.upper(), "") if compass else ""
 
 def maybe_codeblock(text: str, threshold: int = 8) -> str:
     """Wrap in ``` for monospaced readability if many lines."""
-    lines = text.splitlines()
-    if len(lines) >= threshold:
-        return "```\n" + text + "\n```"
+    # Counting newlines beats splitlines(), which allocates a list of
+    # substrings just to be len()'d.
+    if text.count("\n") + 1 >= threshold:
+        return f"```\n{text}\n```"
     return text
 
+# Decided once at startup: 24h for Greenwich, 12h local otherwise.
+# %-I (hour without leading zero) is glibc-only; Windows spells it %#I.
+_HOUR12 = "%#I" if os.name == "nt" else "%-I"
+_IS_UTC = LOCAL_TZ.key == "UTC"
+_UTC_FMT = "%H:%M UTC"
+_TS_FMT = _UTC_FMT if _IS_UTC else f"{_HOUR12}:%M %p %Z"
+
+def _parse_nws_ts(iso_ts: str) -> datetime:
+    """Parse a NOAA ISO timestamp, normalizing a trailing Z to +00:00."""
+    if iso_ts.endswith("Z"):
+        iso_ts = iso_ts[:-1] + "+00:00"  # slice beats a full-string replace
+    return datetime.fromisoformat(iso_ts)
+
+@lru_cache(maxsize=256)
 def format_when_iso_to_tz(iso_ts: Optional[str]) -> str:
     """
     Format a NOAA ISO timestamp into either 24h UTC 'HH:MM UTC' (if TZ is UTC),
@@ -203,127 +313,199 @@ def format_when_iso_to_tz(iso_ts: Optional[str]) -> str:
     """
     if not iso_ts:
         return "—"
-    dt = datetime.fromisoformat(iso_ts.replace("Z", "+00:00"))
+    dt = _parse_nws_ts(iso_ts)
     try:
-        local = dt.astimezone(LOCAL_TZ)
-        if LOCAL_TZ.key == "UTC":
-            return local.strftime("%H:%M UTC")  # 24h for Greenwich
-        return local.strftime("%-I:%M %p %Z")
+        return dt.astimezone(LOCAL_TZ).strftime(_TS_FMT)
     except Exception:
-        return dt.strftime("%H:%M UTC")
+        return dt.strftime(_UTC_FMT)
 
 # ----------------------------- NWS API calls (+ cached wrappers) -----------------------------
+# TTL policy in one place: observations update ~hourly at most stations,
+# daily forecasts every few hours, and a coordinate's /points gridpoint
+# mapping is effectively static.
+OBS_TTL = 300
+FORECAST_TTL = 900
+POINTS_TTL = 86400 * 7
+
+# At most this many NWS requests in flight at once; a command burst queues
+# here instead of fanning out against the API's rate limits.
+_NWS_SEM = asyncio.Semaphore(4)
+
 async def fetch_latest_obs(station_id: str) -> dict:
-    url = f"https://api.weather.gov/stations/{station_id}/observations/latest"
-    headers = {"User-Agent": NWS_UA, "Accept": "application/geo+json"}
-    async with httpx.AsyncClient(timeout=15, follow_redirects=True) as s:
-        r = await s.get(url, headers=headers)
-        r.raise_for_status()
-        return r.json()["properties"]
-
-@lru_cache(maxsize=1)
+    url = f"/stations/{station_id}/observations/latest"
+    async with _NWS_SEM:
+        r = await HTTP.get(url)
+    logging.debug("[nws] %s %s", r.http_version, url)
+    r.raise_for_status()
+    return orjson.loads(r.content)["properties"]
+
 def _points_url(lat: float, lon: float) -> str:
-    return f"https://api.weather.gov/points/{lat},{lon}"
+    return f"/points/{lat},{lon}"
+
+async def fetch_points_props(lat: float, lon: float) -> dict:
+    async with _NWS_SEM:
+        r = await HTTP.get(_points_url(lat, lon))
+    r.raise_for_status()
+    return orjson.loads(r.content)["properties"]
+
+async def points_props_cached(lat: float, lon: float, ttl: int = POINTS_TTL) -> dict:
+    """Cached /points metadata (forecast + observationStations URLs).
+
+    The gridpoint mapping for a coordinate never changes, so a week-long
+    TTL is safe; both the forecast path and station discovery share it.
+    """
+    # Fixed-precision key: near-identical coords (NWS grid is ~2.5 km, so 4
+    # decimals suffice) land on one entry instead of thrashing on float repr.
+    key = f"points:{lat:.4f},{lon:.4f}"
+    hit = cache_get(key)
+    if hit is not None:
+        return hit
+    return await _fetch_single_flight(key, ttl, lambda: fetch_points_props(lat, lon))
 
 async def get_forecast_url(lat: float, lon: float) -> str:
-    url = _points_url(lat, lon)
-    headers = {"User-Agent": NWS_UA, "Accept": "application/geo+json"}
-    async with httpx.AsyncClient(timeout=15, follow_redirects=True) as s:
-        r = await s.get(url, headers=headers)
-        r.raise_for_status()
-        return r.json()["properties"]["forecast"]
+    return (await points_props_cached(lat, lon))["forecast"]
 
 async def fetch_forecast_periods(lat: float, lon: float) -> list[dict]:
     forecast_url = await get_forecast_url(lat, lon)
-    headers = {"User-Agent": NWS_UA, "Accept": "application/geo+json"}
-    async with httpx.AsyncClient(timeout=15, follow_redirects=True) as s:
-        r = await s.get(forecast_url, headers=headers)
-        r.raise_for_status()
-        return r.json()["properties"]["periods"]
-
-async def fetch_latest_obs_cached(station_id: str, ttl: int = 300) -> dict:
-    key = f"obs:{station_id.upper()}"
+    async with _NWS_SEM:
+        r = await HTTP.get(forecast_url)
+    r.raise_for_status()
+    return orjson.loads(r.content)["properties"]["periods"]
+
+# Cache keys recur for the life of the process (few stations, few coords), so
+# build each one once and intern it — lookups then hash/compare by identity
+# instead of re-allocating an f-string per command.
+@lru_cache(maxsize=256)
+def _obs_key(station_id: str) -> str:
+    return sys.intern(f"obs:{station_id}")
+
+@lru_cache(maxsize=256)
+def _obs_embed_key(station_id: str) -> str:
+    return sys.intern(f"obs_embed:{station_id}")
+
+@lru_cache(maxsize=256)
+def _fc_key(lat_k: float, lon_k: float) -> str:
+    return sys.intern(f"fc:{lat_k}:{lon_k}")
+
+# Single-flight: when a popular key expires, only the first coroutine talks
+# to the API; concurrent misses for the same key await its future instead of
+# fanning out duplicate upstream requests.
+_inflight: dict[str, asyncio.Future] = {}
+
+async def _fill_single_flight(key: str, ttl: int, fetch, fut: asyncio.Future) -> None:
+    # Runs as its own task so a waiter's cancellation (e.g. a command
+    # timeout) can't abort the fetch or strand the other waiters.
+    try:
+        value = await fetch()
+    except asyncio.CancelledError:
+        if not fut.done():
+            fut.cancel()  # waiters must wake, not hang
+        raise
+    except Exception as e:
+        if not fut.done():
+            fut.set_exception(e)
+            fut.add_done_callback(lambda f: f.exception())  # quiet if none await
+    else:
+        cache_set(key, value, ttl_seconds=ttl)
+        if not fut.done():
+            fut.set_result(value)
+    finally:
+        _inflight.pop(key, None)
+
+async def _fetch_single_flight(key: str, ttl: int, fetch):
+    fut = _inflight.get(key)
+    if fut is None:
+        fut = asyncio.get_running_loop().create_future()
+        _inflight[key] = fut
+        asyncio.create_task(_fill_single_flight(key, ttl, fetch, fut))
+    # shield: a cancelled waiter (e.g. asyncio.wait_for in a command) drops
+    # out alone instead of cancelling the shared future under everyone else.
+    return await asyncio.shield(fut)
+
+async def fetch_latest_obs_cached(station_id: str, ttl: int = OBS_TTL) -> dict:
+    key = _obs_key(station_id.upper())
     hit = cache_get(key)
     if hit is not None:
-        logging.info(f"[cache] hit {key}")
+        logging.info("[cache] hit %s", key)
         return hit
-    logging.info(f"[cache] miss {key} -> fetching")
-    props = await fetch_latest_obs(station_id)
-    cache_set(key, props, ttl_seconds=ttl)
-    return props
+    logging.info("[cache] miss %s -> fetching", key)
+    return await _fetch_single_flight(key, ttl, lambda: fetch_latest_obs(station_id))
 
-async def fetch_forecast_periods_cached(lat: float, lon: float, ttl: int = 900) -> list[dict]:
+async def fetch_forecast_periods_cached(lat: float, lon: float, ttl: int = FORECAST_TTL) -> list[dict]:
     lat_k = round(lat, 3)
     lon_k = round(lon, 3)
-    key = f"fc:{lat_k}:{lon_k}"
+    key = _fc_key(lat_k, lon_k)
     hit = cache_get(key)
     if hit is not None:
-        logging.info(f"[cache] hit {key}")
+        logging.info("[cache] hit %s", key)
         return hit
-    logging.info(f"[cache] miss {key} -> fetching")
-    periods = await fetch_forecast_periods(lat_k, lon_k)
-    cache_set(key, periods, ttl_seconds=ttl)
-    return periods
+    logging.info("[cache] miss %s -> fetching", key)
+    return await _fetch_single_flight(key, ttl, lambda: fetch_forecast_periods(lat_k, lon_k))
 
 # ----------------------------- Geocoding + nearest NWS station -----------------------------
+_NOMINATIM_HEADERS = {"User-Agent": f"{NWS_UA} (nominatim)", "Accept": "application/json"}
+
 async def geocode_freeform(query: str) -> Optional[tuple[float, float, str]]:
     """
     Use OpenStreetMap Nominatim to turn 'City, ST' into (lat, lon, display_name).
     """
     url = "https://nominatim.openstreetmap.org/search"
     params = {"q": query, "format": "jsonv2", "limit": 1}
-    headers = {"User-Agent": f"{NWS_UA} (nominatim)"}
-    async with httpx.AsyncClient(timeout=15, follow_redirects=True) as s:
-        r = await s.get(url, params=params, headers=headers)
-        r.raise_for_status()
-        data = r.json()
-        if not data:
-            return None
-        first = data[0]
-        lat = float(first["lat"])
-        lon = float(first["lon"])
-        name = first.get("display_name", query)
-        return lat, lon, name
-
-def _haversine_km(lat1, lon1, lat2, lon2):
-    R = 6371.0088
-    p1, p2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlmb = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2)**2 + math.cos(p1)*math.cos(p2)*math.sin(dlmb/2)**2
-    return 2*R*math.asin(math.sqrt(a))
+    r = await HTTP.get(url, params=params, headers=_NOMINATIM_HEADERS)
+    r.raise_for_status()
+    data = orjson.loads(r.content)
+    if not data:
+        return None
+    first = data[0]
+    lat = float(first["lat"])
+    lon = float(first["lon"])
+    name = first.get("display_name", query)
+    return lat, lon, name
+
+_EARTH_RADIUS_KM = 6371.0088
+
+def _haversine_km_vec(lat: float, lon: float, slats: np.ndarray, slons: np.ndarray) -> np.ndarray:
+    """Haversine distance from (lat, lon) to every station, vectorized."""
+    p1 = math.radians(lat)
+    dphi = np.radians(slats - lat)
+    dlmb = np.radians(slons - lon)
+    a = np.sin(dphi/2)**2 + math.cos(p1)*np.cos(np.radians(slats))*np.sin(dlmb/2)**2
+    return 2*_EARTH_RADIUS_KM*np.arcsin(np.sqrt(a))
 
 async def find_nearest_nws_station(lat: float, lon: float) -> Optional[str]:
     """
     NWS points -> observationStations collection -> pick closest by Haversine.
     Returns station ID like 'KMWL'.
     """
-    points = f"https://api.weather.gov/points/{lat},{lon}"
-    headers = {"User-Agent": NWS_UA, "Accept": "application/geo+json"}
-    async with httpx.AsyncClient(timeout=15, follow_redirects=True) as s:
-        rp = await s.get(points, headers=headers)
-        rp.raise_for_status()
-        obs_url = rp.json()["properties"].get("observationStations")
-        if not obs_url:
-            return None
-
-        rs = await s.get(obs_url, headers=headers)
-        rs.raise_for_status()
-        features = rs.json().get("features", [])
-        if not features:
-            return None
-
-        best_id, best_d = None, 1e9
-        for f in features:
-            sid = f["properties"].get("stationIdentifier")
-            geom = f.get("geometry", {})
-            coords = (geom.get("coordinates") or [None, None])
-            slon, slat = coords[0], coords[1]
-            if sid and slat is not None and slon is not None:
-                d = _haversine_km(lat, lon, slat, slon)
-                if d < best_d:
-                    best_id, best_d = sid, d
-        return best_id
+    obs_url = (await points_props_cached(lat, lon)).get("observationStations")
+    if not obs_url:
+        return None
+    return await _nearest_station_from_list(lat, lon, obs_url)
+
+async def _nearest_station_from_list(lat: float, lon: float, obs_url: str) -> Optional[str]:
+    async with _NWS_SEM:
+        rs = await HTTP.get(obs_url)
+    rs.raise_for_status()
+    features = orjson.loads(rs.content).get("features", [])
+    if not features:
+        return None
+
+    sids, slats, slons = [], [], []
+    for f in features:
+        sid = f["properties"].get("stationIdentifier")
+        geom = f.get("geometry", {})
+        coords = (geom.get("coordinates") or [None, None])
+        slon, slat = coords[0], coords[1]
+        if sid and slat is not None and slon is not None:
+            sids.append(sid)
+            slats.append(slat)
+            slons.append(slon)
+    if not sids:
+        return None
+    d = _haversine_km_vec(lat, lon,
+                          np.asarray(slats, dtype=np.float64),
+                          np.asarray(slons, dtype=np.float64))
+    return sids[int(np.argmin(d))]
 
 # ----------------------------- Formatting -----------------------------
 def format_forecast(periods: list[dict], limit: int = 6) -> str:
@@ -348,20 +530,41 @@ def format_forecast(periods: list[dict], limit: int = 6) -> str:
     text = "\n".join(lines) if lines else "No forecast data available."
     return maybe_codeblock(text, threshold=8)
 
+def _v(d: dict, key: str):
+    """d[key]['value'] without allocating a fallback dict when key is absent."""
+    t = d.get(key)
+    return t.get("value") if t else None
+
+# Static embed skeleton; build_obs_embed copies it and fills in the dynamic
+# values, replacing an Embed() plus six method calls with one dict build.
+_OBS_EMBED_TEMPLATE = {
+    "color": COLORS["now"],
+    "footer": {"text": "Source: NWS (weather.gov)"},
+}
+
 def build_obs_embed(p: dict, station_id: str) -> discord.Embed:
     when = format_when_iso_to_tz(p.get("timestamp"))
     desc = p.get("textDescription") or "—"
     icon = wx_emoji(desc)
 
-    t_f  = c_to_f(p.get("temperature",{}).get("value"))
-    hi_f = c_to_f(p.get("heatIndex",{}).get("value"))
-    wc_f = c_to_f(p.get("windChill",{}).get("value"))
-    rh   = p.get("relativeHumidity",{}).get("value")
-    wdir_comp = deg_to_compass(p.get("windDirection",{}).get("value"))
+    # Unit conversions inlined (C*1.8+32, km/h*0.621371): one observation per
+    # call doesn't justify a function frame each. Batch paths (e.g. a future
+    # hourly forecast) should convert whole arrays in one NumPy expression.
+    t_c  = _v(p, "temperature")
+    hi_c = _v(p, "heatIndex")
+    wc_c = _v(p, "windChill")
+    t_f  = None if t_c  is None else t_c  * 1.8 + 32
+    hi_f = None if hi_c is None else hi_c * 1.8 + 32
+    wc_f = None if wc_c is None else wc_c * 1.8 + 32
+    rh   = _v(p, "relativeHumidity")
+    wdir_val = _v(p, "windDirection")
+    wdir_comp = deg_to_compass(None if wdir_val is None else round(wdir_val))
     wdir_arrow = wind_arrow_from_compass(wdir_comp)
-    wspd = kmh_to_mph(p.get("windSpeed",{}).get("value"))
-    gust = kmh_to_mph(p.get("windGust",{}).get("value"))
-    vism = p.get("visibility",{}).get("value")
+    wspd_kmh = _v(p, "windSpeed")
+    gust_kmh = _v(p, "windGust")
+    wspd = None if wspd_kmh is None else wspd_kmh * 0.621371
+    gust = None if gust_kmh is None else gust_kmh * 0.621371
+    vism = _v(p, "visibility")
 
     feels_txt = ""
     if t_f is not None and hi_f is not None and abs(hi_f - t_f) >= 2:
@@ -369,28 +572,26 @@ def build_obs_embed(p: dict, station_id: str) -> discord.Embed:
     elif t_f is not None and wc_f is not None and abs(wc_f - t_f) >= 2:
         feels_txt = f" (feels **{wc_f:.0f}°F**)"
 
-    title = f"{station_id} — {when}"
-    em = discord.Embed(title=title, description=f"{icon} {desc}", color=COLORS["now"])
-
     temp_txt = f"**{t_f:.0f}°F**{feels_txt}" if t_f is not None else "—"
-    em.add_field(name="Temperature", value=temp_txt, inline=True)
-
     rh_txt = f"{rh:.0f}%" if isinstance(rh,(int,float)) else "—"
-    em.add_field(name="Humidity", value=rh_txt, inline=True)
-
     wind_txt = f"{wdir_arrow} {wdir_comp} {wspd:.0f} mph" if isinstance(wspd,(int,float)) else f"{wdir_arrow} {wdir_comp} —"
     if isinstance(gust,(int,float)) and isinstance(wspd,(int,float)) and gust > wspd:
         wind_txt += f"\nGusting **{gust:.0f} mph**"
-    em.add_field(name="Wind", value=wind_txt, inline=True)
-
     vis_txt = f"{vism/1609.344:.1f} mi" if isinstance(vism,(int,float)) else "—"
-    em.add_field(name="Visibility", value=vis_txt, inline=True)
 
-    em.set_footer(text="Source: NWS (weather.gov)")
-    return em
+    d = dict(_OBS_EMBED_TEMPLATE)
+    d["title"] = f"{station_id} — {when}"
+    d["description"] = f"{icon} {desc}"
+    d["fields"] = [
+        {"name": "Temperature", "value": temp_txt, "inline": True},
+        {"name": "Humidity",    "value": rh_txt,   "inline": True},
+        {"name": "Wind",        "value": wind_txt, "inline": True},
+        {"name": "Visibility",  "value": vis_txt,  "inline": True},
+    ]
+    return discord.Embed.from_dict(d)
 
 async def build_forecast_embed(lat: float, lon: float, limit: int = 6) -> discord.Embed:
-    periods = await fetch_forecast_periods_cached(lat, lon, ttl=900)
+    periods = await fetch_forecast_periods_cached(lat, lon)
     block = format_forecast(periods, limit=limit)
     em = discord.Embed(
         title="NWS Forecast",
@@ -401,56 +602,139 @@ async def build_forecast_embed(lat: float, lon: float, limit: int = 6) -> discor
     return em
 
 # ----------------------------- Events -----------------------------
+CMD_SIG_PATH = os.path.join(DATA_DIR, ".cmd_sig")
+
+def _command_signature() -> str:
+    """Stable fingerprint of the registered command set (and sync target)."""
+    dicts = sorted((c.to_dict(tree) for c in tree.get_commands()), key=lambda d: d["name"])
+    payload = orjson.dumps(dicts, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha1(payload + f"|{GUILD_ID}".encode()).hexdigest()
+
+async def _sync_commands() -> None:
+    """Sync the tree only when the command set actually changed."""
+    sig = _command_signature()
+    try:
+        with open(CMD_SIG_PATH, "r", encoding="utf-8") as f:
+            if f.read().strip() == sig:
+                logging.info("Command set unchanged; skipping sync.")
+                return
+    except OSError:
+        pass
+    if GUILD_ID:
+        guild = discord.Object(id=GUILD_ID)
+        tree.copy_global_to(guild=guild)
+        synced = await tree.sync(guild=guild)
+        logging.info("Guild sync ok: %s", [c.name for c in synced])
+    else:
+        synced = await tree.sync()
+        logging.info("Global sync ok: %s", [c.name for c in synced])
+    with open(CMD_SIG_PATH, "w", encoding="utf-8") as f:
+        f.write(sig)
+
+@client.event
+async def setup_hook():
+    asyncio.create_task(_cache_sweep_loop())
+    try:
+        await _sync_commands()
+    except Exception as e:
+        logging.error("Sync error: %s", e)
+
 @client.event
 async def on_connect():
     logging.info("Connected to Discord Gateway.")
 
 @client.event
 async def on_ready():
-    logging.info(f"Logged in as {client.user} (ID: {client.user.id})")
-    logging.info("Guilds: " + ", ".join(f"{g.name} ({g.id})" for g in client.guilds))
+    logging.info("Logged in as %s (ID: %s)", client.user, client.user.id)
+    if logging.getLogger().isEnabledFor(logging.INFO):
+        logging.info("Guilds: %s", ", ".join(f"{g.name} ({g.id})" for g in client.guilds))
     try:
         await client.change_presence(activity=discord.Game(name="/wx_set /wxnow /wxforecast"))
     except Exception:
         pass
 
-    try:
-        if GUILD_ID:
-            guild = discord.Object(id=GUILD_ID)
-            tree.copy_global_to(guild=guild)
-            synced = await tree.sync(guild=guild)
-            logging.info(f"Guild sync ok: {[c.name for c in synced]}")
-        else:
-            synced = await tree.sync()
-            logging.info(f"Global sync ok: {[c.name for c in synced]}")
-    except Exception as e:
-        logging.error(f"Sync error: {e}")
-
 # ----------------------------- Commands -----------------------------
 @tree.command(name="ping", description="Health check")
 async def ping(interaction: discord.Interaction):
     await interaction.response.send_message("pong")
 
+NWS_WAIT = 10  # seconds to wait on NWS before giving the user an error
+
+@tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    if isinstance(error, app_commands.CommandOnCooldown):
+        msg = f"Easy there — try again in {error.retry_after:.1f}s."
+        if interaction.response.is_done():
+            await interaction.followup.send(msg, ephemeral=True)
+        else:
+            await interaction.response.send_message(msg, ephemeral=True)
+        return
+    logging.error("App command error: %s", error)
+
 @tree.command(name="wxnow", description="Current conditions from NWS")
+@app_commands.checks.cooldown(1, 5.0, key=lambda i: i.user.id)
 async def wxnow(interaction: discord.Interaction):
+    user_station, _, _, _ = resolve_user_location(interaction.user.id)
+    # The rendered embed is cached next to the obs, so repeat /wxnow
+    # within the TTL skips build_obs_embed entirely.
+    embed_key = _obs_embed_key(user_station.upper())
+    cached = cache_get(embed_key)
+    # Kick off the fetch before deferring so the two waits overlap.
+    task = None if cached is not None else asyncio.create_task(fetch_latest_obs_cached(user_station))
     await interaction.response.defer(thinking=True)
     try:
-        user_station, _, _, _ = resolve_user_location(interaction.user.id)
-        props = await fetch_latest_obs_cached(user_station, ttl=300)
-        em = build_obs_embed(props, user_station)
+        if cached is not None:
+            em = discord.Embed.from_dict(cached)
+        else:
+            props = await asyncio.wait_for(task, timeout=NWS_WAIT)
+            em = build_obs_embed(props, user_station)
+            # Expire the embed with the obs entry it was rendered from: the
+            # obs may have been cached earlier (e.g. by /wx), and a fresh
+            # OBS_TTL here would keep serving it past the obs window.
+            ttl = cache_ttl_remaining(_obs_key(user_station.upper()))
+            if ttl > 0:
+                cache_set(embed_key, em.to_dict(), ttl_seconds=ttl)
         await interaction.followup.send(embed=em)
+    except asyncio.TimeoutError:
+        await interaction.followup.send("NWS is responding slowly — try again in a moment.")
     except httpx.HTTPStatusError as e:
         await interaction.followup.send(f"Error from NWS: {e.response.status_code}")
     except Exception as e:
         await interaction.followup.send(f"Unexpected error: {e}")
 
 @tree.command(name="wxforecast", description="NWS forecast for your location (next few periods)")
+@app_commands.checks.cooldown(1, 5.0, key=lambda i: i.user.id)
 async def wxforecast(interaction: discord.Interaction):
+    _, user_lat, user_lon, _ = resolve_user_location(interaction.user.id)
+    task = asyncio.create_task(build_forecast_embed(user_lat, user_lon, limit=6))
     await interaction.response.defer(thinking=True)
     try:
-        _, user_lat, user_lon, _ = resolve_user_location(interaction.user.id)
-        em = await build_forecast_embed(user_lat, user_lon, limit=6)
+        em = await asyncio.wait_for(task, timeout=NWS_WAIT)
         await interaction.followup.send(embed=em)
+    except asyncio.TimeoutError:
+        await interaction.followup.send("NWS is responding slowly — try again in a moment.")
+    except httpx.HTTPStatusError as e:
+        await interaction.followup.send(f"Error from NWS: {e.response.status_code}")
+    except Exception as e:
+        await interaction.followup.send(f"Unexpected error: {e}")
+
+@tree.command(name="wx", description="Current conditions + forecast in one shot")
+@app_commands.checks.cooldown(1, 5.0, key=lambda i: i.user.id)
+async def wx(interaction: discord.Interaction):
+    user_station, user_lat, user_lon, _ = resolve_user_location(interaction.user.id)
+    # Obs and forecast hit independent endpoints — fetch them concurrently,
+    # overlapping both with the defer round-trip.
+    task = asyncio.gather(
+        fetch_latest_obs_cached(user_station),
+        build_forecast_embed(user_lat, user_lon, limit=6),
+    )
+    await interaction.response.defer(thinking=True)
+    try:
+        props, fc_em = await asyncio.wait_for(task, timeout=NWS_WAIT)
+        obs_em = build_obs_embed(props, user_station)
+        await interaction.followup.send(embeds=[obs_em, fc_em])
+    except asyncio.TimeoutError:
+        await interaction.followup.send("NWS is responding slowly — try again in a moment.")
     except httpx.HTTPStatusError as e:
         await interaction.followup.send(f"Error from NWS: {e.response.status_code}")
     except Exception as e:
@@ -502,7 +786,18 @@ async def wx_set(interaction: discord.Interaction, location: str, units: str = "
             return
         lat, lon, display_name = geo
 
-        station = await find_nearest_nws_station(lat, lon)
+        obs_url = (await points_props_cached(lat, lon)).get("observationStations")
+        station = None
+        if obs_url:
+            # Rank stations and warm the forecast cache for /wxforecast in
+            # parallel; the warm-up is best-effort, so its errors are ignored.
+            station, _ = await asyncio.gather(
+                _nearest_station_from_list(lat, lon, obs_url),
+                fetch_forecast_periods_cached(lat, lon),
+                return_exceptions=True,
+            )
+            if isinstance(station, BaseException):
+                raise station
         if not station:
             await interaction.followup.send(f"Found {display_name}, but couldn't find a nearby NWS station.")
             return
@@ -530,4 +825,9 @@ if __name__ == "__main__":
     if not DISCORD_TOKEN:
         logging.error("❌ DISCORD_TOKEN not set. Put it in your .env.")
     else:
+        try:
+            import uvloop  # libuv event loop; noticeably faster for socket-heavy workloads
+            uvloop.install()
+        except ImportError:
+            pass  # stdlib asyncio loop is fine (e.g. Windows)
         client.run(DISCORD_TOKEN)
@@ -1,43 +1,69 @@
 # storage.py
-import json, os, threading
+import os, atexit, sqlite3, threading
 
-PATH = "data/locations.json"
+import orjson
+
+DB_PATH = "data/locations.db"
+JSON_PATH = "data/locations.json"  # legacy store, imported once below
 os.makedirs("data", exist_ok=True)
 _lock = threading.Lock()
 
-def _load():
-    if not os.path.exists(PATH):
-        return {}
+# WAL mode: writes touch one row instead of rewriting a whole JSON file,
+# readers never block on writers, and a crash can't corrupt the store.
+# Same file and schema as main.py's store, so the two stay interchangeable.
+_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+_conn.execute("PRAGMA journal_mode=WAL")
+_conn.execute("PRAGMA synchronous=NORMAL")  # no per-commit fsync storm
+_conn.execute(
+    "CREATE TABLE IF NOT EXISTS locations("
+    " user_id TEXT NOT NULL, name TEXT NOT NULL,"
+    " station TEXT, lat REAL, lon REAL, units TEXT,"
+    " PRIMARY KEY(user_id, name))"
+)
+atexit.register(_conn.close)
+
+def _migrate_json():
+    """One-time import of the old locations.json store."""
+    if not os.path.exists(JSON_PATH):
+        return
     try:
-        with open(PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(JSON_PATH, "rb") as f:
+            data = orjson.loads(f.read())
     except Exception:
-        return {}
+        return
+    with _lock, _conn:
+        for user_id, entries in data.items():
+            for name, e in entries.items():
+                _conn.execute(
+                    "INSERT OR IGNORE INTO locations VALUES(?,?,?,?,?,?)",
+                    (user_id, name, e.get("station_id"), e.get("lat"), e.get("lon"), e.get("units")),
+                )
+    os.replace(JSON_PATH, JSON_PATH + ".migrated")
 
-def _save(data):
-    with open(PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+_migrate_json()
 
 def save_location(user_id: str, name: str, entry: dict):
-    with _lock:
-        data = _load()
-        user = data.get(user_id, {})
-        user[name] = entry
-        data[user_id] = user
-        _save(data)
+    with _lock, _conn:
+        _conn.execute(
+            "INSERT OR REPLACE INTO locations VALUES(?,?,?,?,?,?)",
+            (user_id, name, entry.get("station_id"), entry.get("lat"), entry.get("lon"), entry.get("units")),
+        )
 
 def get_location(user_id: str, name: str = "home"):
-    data = _load()
-    return data.get(user_id, {}).get(name)
+    row = _conn.execute(
+        "SELECT station, lat, lon, units FROM locations WHERE user_id=? AND name=?",
+        (user_id, name),
+    ).fetchone()
+    if row is None:
+        return None
+    station, lat, lon, units = row
+    return {"station_id": station, "lat": lat, "lon": lon, "units": units}
 
 def list_locations(user_id: str):
-    return list(_load().get(user_id, {}).keys())
+    rows = _conn.execute("SELECT name FROM locations WHERE user_id=?", (user_id,))
+    return [r[0] for r in rows]
 
 def delete_location(user_id: str, name: str):
-    with _lock:
-        data = _load()
-        if user_id in data and name in data[user_id]:
-            del data[user_id][name]
-            _save(data)
-            return True
-    return False
+    with _lock, _conn:
+        cur = _conn.execute("DELETE FROM locations WHERE user_id=? AND name=?", (user_id, name))
+        return cur.rowcount > 0